@@ -0,0 +1,74 @@
+import asyncio
+import logging
+from typing import Any, AsyncGenerator, Callable, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncCaller:
+    """Shared bounded-concurrency and retry pool for model invocations.
+
+    Every agent routed through one instance shares one semaphore, so
+    ParallelAgent or graph-level fan-out cannot burst past an endpoint's
+    rate limit (which just trades speed for 429s plus server-side
+    backoff). Retryable failures are retried with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        max_retries: int = 6,
+        base_delay: float = 1.0,
+        retryable: Tuple[Type[BaseException], ...] = (
+            ConnectionError,
+            TimeoutError,
+        ),
+    ):
+        self._sem = asyncio.Semaphore(max_concurrency)
+        self._max_retries = max_retries
+        self._base_delay = base_delay
+        self._retryable = retryable
+
+    async def call(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Awaits fn(*args, **kwargs) under the shared semaphore."""
+        async with self._sem:
+            for attempt in range(self._max_retries):
+                try:
+                    return await fn(*args, **kwargs)
+                except self._retryable as e:
+                    if attempt == self._max_retries - 1:
+                        raise
+                    delay = self._base_delay * (2 ** attempt)
+                    logger.warning(
+                        "Retryable error from %s (%s); retrying in %.1fs",
+                        getattr(fn, '__name__', fn), e, delay,
+                    )
+                    await asyncio.sleep(delay)
+
+    async def stream(
+        self, agen_fn: Callable, *args: Any, **kwargs: Any
+    ) -> AsyncGenerator[Any, None]:
+        """Drains an async-generator call under the shared semaphore.
+
+        Retryable failures are retried only while nothing has been
+        yielded yet: once an item has been forwarded, re-running the
+        stream would deliver the already-consumed prefix a second time
+        (and poison downstream caches), so mid-stream failures propagate.
+        """
+        async with self._sem:
+            for attempt in range(self._max_retries):
+                yielded = False
+                try:
+                    async for item in agen_fn(*args, **kwargs):
+                        yield item
+                        yielded = True
+                    return
+                except self._retryable as e:
+                    if yielded or attempt == self._max_retries - 1:
+                        raise
+                    delay = self._base_delay * (2 ** attempt)
+                    logger.warning(
+                        "Retryable error from %s (%s); retrying in %.1fs",
+                        getattr(agen_fn, '__name__', agen_fn), e, delay,
+                    )
+                    await asyncio.sleep(delay)
@@ -1,4 +1,13 @@
 import asyncio
+import functools
+import logging
+import os
+import random
+import re
+import sys
+import time
+from itertools import chain
+
 import agentneo
 from typing import AsyncGenerator
 
@@ -8,134 +17,317 @@ from google.adk.models.base_llm import BaseLlm
 from google.adk.models.llm_request import LlmRequest
 from google.adk.models.llm_response import LlmResponse
 from google.adk.agents import SequentialAgent, ParallelAgent, LlmAgent
+from google.adk.agents.parallel_agent import (
+    _create_branch_ctx_for_sub_agent,
+    _merge_agent_run,
+    _merge_agent_run_pre_3_11,
+)
 from google.adk.runners import InMemoryRunner
 
+logger = logging.getLogger(__name__)
+
 # --- AgentNeo Integration ---
 # AgentNeo allows tracing specific functions or the entire execution flow.
-# Here we define a TracedMockLlm that explicitly decorates the generation method.
-
-class TracedMockLlm(BaseLlm):
-    model: str = "mock-model-traced"
-
-    # We decorate the generation method to capture inputs and outputs in AgentNeo
-    @agentneo.trace(name="llm_generate", input_args=["llm_request"])
-    async def generate_content_async(
-        self, llm_request: LlmRequest, stream: bool = False
-    ) -> AsyncGenerator[LlmResponse, None]:
-        
-        # --- Logic copied from demo_workflow.py MockLlm ---
-        prompt_text = ""
-        if llm_request.config.system_instruction:
-            sys_inst = llm_request.config.system_instruction
-            if isinstance(sys_inst, str):
-                prompt_text += sys_inst + "\n"
-            elif hasattr(sys_inst, 'parts'):
-                 for part in sys_inst.parts:
-                     if part.text:
-                        prompt_text += part.text + "\n"
-        
-        last_user_text = ""
-        history_text = ""
-        for content in llm_request.contents:
-            for part in content.parts:
-                if part.text:
-                    history_text += part.text + "\n"
-        
-        for content in reversed(llm_request.contents):
-            if content.role == 'user':
-                for part in content.parts:
-                    if part.text:
-                        last_user_text += part.text + "\n"
-                break
-        
-        full_context = prompt_text + "\n" + history_text
-        response_text = "I am a mock response."
-        
-        if "safety gatekeeper" in full_context:
-            if "Cooking" in last_user_text or "cooking" in last_user_text:
-                response_text = "REJECTED"
-            else:
-                response_text = "APPROVED"
-        elif "benefits of the topic" in full_context:
-            if "status: REJECTED" in full_context: 
-                 response_text = "Analysis Skipped"
-            else:
-                 response_text = "1. Increased efficiency\n2. Automation of tasks\n3. New capabilities"
-        elif "risks or downsides" in full_context:
-             if "status: REJECTED" in full_context:
-                 response_text = "Analysis Skipped"
-             else:
-                 response_text = "1. Job displacement\n2. Bias in algorithms\n3. Security vulnerabilities"
-        elif "lead analyst" in full_context:
-             if "Analysis Skipped" in full_context:
-                 response_text = "I apologize, but we cannot analyze this topic as it is outside our safety guidelines."
-             else:
-                 response_text = "FINAL REPORT:\nThe research team identified key benefits including efficiency and automation, while noting risks such as job displacement and bias."
-
-        # Return response
-        response = LlmResponse(
-            partial=False,
-            content=types.Content(
-                role='model',
-                parts=[types.Part(text=response_text)]
+# Here the generation method of every specialized mock carries a span
+# decorator, and main() wraps the whole run in a coarse span.
+
+# The per-generate span is paid on every LLM call; for high-throughput or
+# benchmark runs it can be head-sampled down (ADK_TRACE_SAMPLE=0 disables it
+# entirely while keeping the coarse full_workflow_run span in main()).
+TRACE_SAMPLE_RATE = float(os.environ.get("ADK_TRACE_SAMPLE", "1.0"))
+
+# Span records are only enqueued on the request path; the background flusher
+# started in main() hands them to agentneo off the critical section. A full
+# queue drops the span (head-based sampling under load).
+SPAN_QUEUE: asyncio.Queue = asyncio.Queue(maxsize=10000)
+
+def _enqueue_span(name, start_ns, end_ns):
+    if random.random() >= TRACE_SAMPLE_RATE:
+        return
+    try:
+        SPAN_QUEUE.put_nowait((name, start_ns, end_ns))
+    except asyncio.QueueFull:
+        pass
+
+def _async_span(name):
+    """Decorator for async generators: records (name, start, end) only."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            t0 = time.perf_counter_ns()
+            try:
+                async for item in fn(*args, **kwargs):
+                    yield item
+            finally:
+                _enqueue_span(name, t0, time.perf_counter_ns())
+        return wrapper
+    return decorator
+
+async def _span_flusher():
+    """Drains SPAN_QUEUE and emits spans to agentneo in the background."""
+    while True:
+        name, start_ns, end_ns = await SPAN_QUEUE.get()
+        try:
+            agentneo.record(
+                {"name": name, "start_ns": start_ns, "end_ns": end_ns}
             )
-        )
-        yield response
+        except Exception:
+            # A failed emission drops the span, never the flusher: with the
+            # task dead, SPAN_QUEUE.join() in main's finally would block
+            # forever on the records still queued.
+            logger.exception("Failed to record span %s", name)
+        finally:
+            SPAN_QUEUE.task_done()
+
+# Sentinel phrases the branch logic keys on. We collect the ones present while
+# walking the request once, so each branch test is an O(1) set lookup instead
+# of another full scan of the concatenated context.
+SENTINELS = tuple(sys.intern(s) for s in (
+    "safety gatekeeper",
+    "benefits of the topic",
+    "risks or downsides",
+    "lead analyst",
+    "status: REJECTED",
+    "Analysis Skipped",
+))
+
+# One compiled alternation finds every sentinel in a single pass over the
+# text, instead of one full substring scan per sentinel.
+_SENTINEL_RX = re.compile("|".join(re.escape(s) for s in SENTINELS))
+
+def _scan_sentinels(text: str, seen: set) -> None:
+    seen.update(_SENTINEL_RX.findall(text))
+
+# ADK renders a fresh instruction object per model call (the templated
+# instructions especially), so a grow-forever id()-keyed map would pin every
+# instruction for the life of the process while almost never hitting. A
+# single last-seen slot keeps the repeat-lookup fast path bounded to one
+# retained object.
+_SYS_SLOT = (None, frozenset())
+
+def _sys_sentinels(sys_inst) -> frozenset:
+    global _SYS_SLOT
+    cached_inst, cached_seen = _SYS_SLOT
+    if cached_inst is sys_inst:
+        return cached_seen
+    seen = set()
+    if isinstance(sys_inst, str):
+        _scan_sentinels(sys_inst, seen)
+    elif hasattr(sys_inst, 'parts'):
+        for part in sys_inst.parts:
+            if part.text:
+                _scan_sentinels(part.text, seen)
+    result = frozenset(seen)
+    _SYS_SLOT = (sys_inst, result)
+    return result
+
+def _text_response(text: str) -> LlmResponse:
+    return LlmResponse(
+        partial=False,
+        content=types.Content(role='model', parts=[types.Part(text=text)]),
+    )
+
+# The mocks only ever emit a fixed set of responses, so the Pydantic model
+# construction is paid once at import instead of on every call.
+RESP_REJECTED = _text_response("REJECTED")
+RESP_APPROVED = _text_response("APPROVED")
+RESP_SKIPPED = _text_response("Analysis Skipped")
+RESP_BENEFITS = _text_response(
+    "1. Increased efficiency\n2. Automation of tasks\n3. New capabilities"
+)
+RESP_RISKS = _text_response(
+    "1. Job displacement\n2. Bias in algorithms\n3. Security vulnerabilities"
+)
+RESP_APOLOGY = _text_response(
+    "I apologize, but we cannot analyze this topic as it is outside our safety guidelines."
+)
+RESP_FINAL_REPORT = _text_response(
+    "FINAL REPORT:\nThe research team identified key benefits including "
+    "efficiency and automation, while noting risks such as job displacement and bias."
+)
+
+# Derived last-user text, cached for the most recent request only: an
+# LlmRequest is fixed for the turn, so back-to-back lookups against the same
+# request pay the reversed scan once. A single slot rather than an id()-keyed
+# map — ADK builds a fresh LlmRequest per call, so an unbounded map would
+# retain every request (full conversation included) and essentially never
+# hit.
+_LAST_USER_SLOT = (None, "")
+
+def last_user_text(llm_request: LlmRequest) -> str:
+    global _LAST_USER_SLOT
+    cached_req, cached_text = _LAST_USER_SLOT
+    if cached_req is llm_request:
+        return cached_text
+    text = ""
+    for content in reversed(llm_request.contents):
+        if content.role == 'user':
+            text = "".join(
+                part.text + "\n" for part in content.parts if part.text
+            )
+            break
+    _LAST_USER_SLOT = (llm_request, text)
+    return text
+
+def make_mock_llm(tag: str, respond, scan_context: bool = True) -> BaseLlm:
+    """Builds a specialized mock LLM for one agent.
+
+    Every agent's instruction is fixed at construction time, so instead of a
+    shared mock running the whole if/elif routing chain per call, each agent
+    gets its own class whose body contains only the branch it needs. respond
+    maps (seen, llm_request) to the prebuilt response; agents that route on
+    the last user message alone set scan_context=False and skip the sentinel
+    scan entirely.
+    """
+
+    class SpecializedMockLlm(BaseLlm):
+        model: str = f"mock-model-{tag}"
+
+        # Span timing is captured here; emission happens off-path in
+        # _span_flusher.
+        @_async_span(f"llm_generate_{tag}")
+        async def generate_content_async(
+            self, llm_request: LlmRequest, stream: bool = False
+        ) -> AsyncGenerator[LlmResponse, None]:
+            seen = set()
+            if scan_context:
+                if llm_request.config.system_instruction:
+                    seen.update(
+                        _sys_sentinels(llm_request.config.system_instruction)
+                    )
+                # Flat iteration over every part; chain.from_iterable keeps
+                # the nested-loop dispatch in C.
+                for part in chain.from_iterable(
+                    content.parts for content in llm_request.contents
+                ):
+                    if part.text:
+                        _scan_sentinels(part.text, seen)
+            yield respond(seen, llm_request)
+
+    return SpecializedMockLlm()
+
+# One single-branch mock per agent: the gatekeeper only inspects the last
+# user message (no context scan at all), the others only their own sentinel.
+gatekeeper_llm = make_mock_llm(
+    "gatekeeper",
+    lambda seen, req: (
+        RESP_REJECTED
+        if "cooking" in last_user_text(req).lower()
+        else RESP_APPROVED
+    ),
+    scan_context=False,
+)
+benefits_llm = make_mock_llm(
+    "benefits",
+    lambda seen, req: (
+        RESP_SKIPPED if "status: REJECTED" in seen else RESP_BENEFITS
+    ),
+)
+risks_llm = make_mock_llm(
+    "risks",
+    lambda seen, req: (
+        RESP_SKIPPED if "status: REJECTED" in seen else RESP_RISKS
+    ),
+)
+aggregator_llm = make_mock_llm(
+    "aggregator",
+    lambda seen, req: (
+        RESP_APOLOGY if "Analysis Skipped" in seen else RESP_FINAL_REPORT
+    ),
+)
 
 # --- Re-assemble Agents with Traced LLM ---
 
-traced_llm = TracedMockLlm()
+# Interned, module-level instruction constants: each string exists exactly
+# once and is passed by reference, so identity-based fast paths (dict/set
+# keying, pointer comparison before content) apply wherever they are reused.
+GATEKEEPER_INSTRUCTION = sys.intern(
+    "You are a safety gatekeeper. You analyze the user's topic. "
+    "If the topic involves 'cooking', set the status to 'REJECTED'. "
+    "Otherwise, set it to 'APPROVED'. "
+    "Return ONLY the status word."
+)
+BENEFITS_INSTRUCTION = sys.intern(
+    "Current topic status: {topic_status}. "
+    "If status is REJECTED, reply with 'Analysis Skipped'. "
+    "Otherwise, list 3 benefits of the topic."
+)
+RISKS_INSTRUCTION = sys.intern(
+    "Current topic status: {topic_status}. "
+    "If status is REJECTED, reply with 'Analysis Skipped'. "
+    "Otherwise, list 3 potential risks or downsides of the topic."
+)
+AGGREGATOR_INSTRUCTION = sys.intern(
+    "You are the lead analyst. "
+    "Review the reports from the research team. "
+    "Benefits Report: {benefits_report}. "
+    "Risks Report: {risks_report}. "
+    "Synthesize them into a final short summary. "
+    "If the reports say 'Skipped', just apologize to the user."
+)
 
 gatekeeper = LlmAgent(
     name="gatekeeper",
-    model=traced_llm,
-    instruction=(
-        "You are a safety gatekeeper. You analyze the user's topic. "
-        "If the topic involves 'cooking', set the status to 'REJECTED'. "
-        "Otherwise, set it to 'APPROVED'. "
-        "Return ONLY the status word."
-    ),
+    model=gatekeeper_llm,
+    instruction=GATEKEEPER_INSTRUCTION,
     output_key="topic_status",
 )
 
 benefits_agent = LlmAgent(
     name="benefits_expert",
-    model=traced_llm,
-    instruction=(
-        "Current topic status: {topic_status}. "
-        "If status is REJECTED, reply with 'Analysis Skipped'. "
-        "Otherwise, list 3 benefits of the topic."
-    ),
+    model=benefits_llm,
+    instruction=BENEFITS_INSTRUCTION,
     output_key="benefits_report",
 )
 
 risks_agent = LlmAgent(
     name="risks_expert",
-    model=traced_llm,
-    instruction=(
-        "Current topic status: {topic_status}. "
-        "If status is REJECTED, reply with 'Analysis Skipped'. "
-        "Otherwise, list 3 potential risks or downsides of the topic."
-    ),
+    model=risks_llm,
+    instruction=RISKS_INSTRUCTION,
     output_key="risks_report",
 )
 
-research_team = ParallelAgent(
+class BoundedParallelAgent(ParallelAgent):
+    """ParallelAgent with a cap on concurrently running sub-agents.
+
+    ADK's ParallelAgent already drives every sub-agent concurrently; this
+    variant funnels each run through a shared semaphore so a large research
+    team fans out at most max_parallel in-flight sub-agents at a time.
+    """
+
+    max_parallel: int = 0
+
+    async def _run_async_impl(self, ctx):
+        if not self.sub_agents:
+            return
+        sem = asyncio.Semaphore(self.max_parallel or len(self.sub_agents))
+
+        async def gated_run(sub_agent):
+            branch_ctx = _create_branch_ctx_for_sub_agent(self, sub_agent, ctx)
+            async with sem:
+                async for event in sub_agent.run_async(branch_ctx):
+                    yield event
+
+        merge_func = (
+            _merge_agent_run
+            if sys.version_info >= (3, 11)
+            else _merge_agent_run_pre_3_11
+        )
+        async for event in merge_func(
+            [gated_run(sub) for sub in self.sub_agents]
+        ):
+            yield event
+
+research_team = BoundedParallelAgent(
     name="research_team",
-    sub_agents=[benefits_agent, risks_agent]
+    sub_agents=[benefits_agent, risks_agent],
+    max_parallel=2,
 )
 
 aggregator = LlmAgent(
     name="aggregator",
-    model=traced_llm,
-    instruction=(
-        "You are the lead analyst. "
-        "Review the reports from the research team. "
-        "Benefits Report: {benefits_report}. "
-        "Risks Report: {risks_report}. "
-        "Synthesize them into a final short summary. "
-        "If the reports say 'Skipped', just apologize to the user."
-    )
+    model=aggregator_llm,
+    instruction=AGGREGATOR_INSTRUCTION,
 )
 
 workflow = SequentialAgent(
@@ -143,34 +335,60 @@ workflow = SequentialAgent(
     sub_agents=[gatekeeper, research_team, aggregator]
 )
 
-async def main():
+async def run_once(runner, prompt, session_id):
+    # Wrap the high-level execution in a trace
+    # The inner LLM calls will be nested within this span
+    @agentneo.trace(name="full_workflow_run")
+    async def run_wrapper():
+        await runner.run_debug(prompt, session_id=session_id)
+
+    await run_wrapper()
+
+async def main(prompts=None, concurrency=4):
     print("Initializing AgentNeo Project...")
     # Typically you would call agentneo.init() here with credentials
     # agentneo.create_project(project_name="ADK Demo")
-    
+
+    # One runner serves the whole batch; per-run construction (session store
+    # init, model registration, tracer setup) is paid once.
     runner = InMemoryRunner(agent=workflow)
-    
+    prompts = prompts or ["Please analyze 'Artificial Intelligence'."]
+
     print("\n--- Starting Traced Execution ---")
-    
-    # Wrap the high-level execution in a trace
-    # The inner LLM calls will be nested within this span
+
+    flusher = asyncio.create_task(_span_flusher())
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _one(idx, prompt):
+        # Each prompt gets its own session so concurrent runs stay isolated.
+        async with sem:
+            await run_once(runner, prompt, session_id=f"session_{idx}")
+
     try:
         # Create a session context
         # agentneo.start_session("adk-run-001")
-        
-        # We manually trace the run call
-        @agentneo.trace(name="full_workflow_run")
-        async def run_wrapper():
-            await runner.run_debug("Please analyze 'Artificial Intelligence'.")
-            
-        await run_wrapper()
-        
+
+        await asyncio.gather(
+            *(_one(idx, prompt) for idx, prompt in enumerate(prompts))
+        )
+
         print("\n--- Execution Complete ---")
         print("Traces captured. To view results, you would typically run:")
         print("  agentneo launch_dashboard")
-        
+
     except Exception as e:
         print(f"Error during execution: {e}")
+    finally:
+        # Let queued spans drain before tearing the flusher down.
+        await SPAN_QUEUE.join()
+        flusher.cancel()
 
 if __name__ == "__main__":
+    # libuv-backed event loop when available; the workload is a chain of
+    # small await points, so loop overhead is worth shaving.
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
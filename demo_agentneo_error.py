@@ -1,4 +1,5 @@
 import asyncio
+import re
 from typing import AsyncGenerator, List
 
 # Import necessary ADK components
@@ -17,65 +18,139 @@ def mock_training_check():
     return "Training finished successfully. Artifact: model_v1.pt (12GB)"
 
 def mock_gsutil_backup(filenames: List[str], bucket: str):
-    """Simulates gsutil cp with a disk space failure."""
+    """Simulates gsutil cp with a disk space failure.
+
+    Failures are reported as a structured dict carrying the errno, so the
+    LLM can route on a field instead of substring-matching a stringified
+    (potentially huge) tool payload.
+    """
     print(f"\n[Tool:mock_gsutil_backup] Attempting to copy {filenames} to {bucket}...")
-    for f in filenames:
-        if "model" in f:
-            # Simulate a disk full error during the staging phase of upload
-            raise OSError(f"[Errno 28] No space left on device: '/tmp/gsutil_staging/{f}'. Upload failed.")
-    return "Upload successful."
+    try:
+        for f in filenames:
+            if "model" in f:
+                # Simulate a disk full error during the staging phase of upload
+                raise OSError(
+                    28,
+                    f"No space left on device: '/tmp/gsutil_staging/{f}'. Upload failed.",
+                )
+        return {"status": "ok", "msg": "Upload successful."}
+    except OSError as e:
+        return {"status": "error", "errno": e.errno, "msg": str(e)}
 
 # --- 2. Mock LLM (without AgentNeo tracing) ---
 
+# Sentinel phrases the routing logic below keys on. They are collected in one
+# pass over the request, so each branch test is an O(1) set lookup rather than
+# another scan of a freshly concatenated context string.
+SENTINELS = (
+    "Check training status",
+    "Training finished",
+    "Backup the model",
+    "No space left",
+    "Upload successful",
+)
+
+# Single compiled alternation: one pass over the text reports every sentinel,
+# instead of one substring scan per sentinel.
+_SENTINEL_RX = re.compile("|".join(re.escape(s) for s in SENTINELS))
+
+# Sentinels that only ever come from tool outputs. Once one is found the
+# branch logic has all the signal it needs from the history.
+_TOOL_EVIDENCE = frozenset({"Training finished", "No space left", "Upload successful"})
+
+def _scan_sentinels(text: str, seen: set) -> None:
+    seen.update(_SENTINEL_RX.findall(text))
+
+# ADK renders a fresh instruction object per model call, so a grow-forever
+# id()-keyed map would pin every instruction for the life of the process
+# while almost never hitting. A single last-seen slot keeps the
+# repeat-lookup fast path bounded to one retained object.
+_SYS_SLOT = (None, frozenset())
+
+def _sys_sentinels(sys_inst) -> frozenset:
+    global _SYS_SLOT
+    cached_inst, cached_seen = _SYS_SLOT
+    if cached_inst is sys_inst:
+        return cached_seen
+    seen = set()
+    if isinstance(sys_inst, str):
+        _scan_sentinels(sys_inst, seen)
+    elif hasattr(sys_inst, 'parts'):
+        for part in sys_inst.parts:
+            if part.text:
+                _scan_sentinels(part.text, seen)
+    result = frozenset(seen)
+    _SYS_SLOT = (sys_inst, result)
+    return result
+
+# Pool of Part objects keyed by their literal text: the mock emits a bounded
+# set of responses, so Pydantic model construction drops to zero after the
+# first use of each string. The ADK treats emitted parts as read-only.
+_PART_POOL: dict = {}
+
+def part_text(text: str) -> types.Part:
+    part = _PART_POOL.get(text)
+    if part is None:
+        part = _PART_POOL[text] = types.Part(text=text)
+    return part
+
 class MockLlm(BaseLlm):
     model: str = "mock-model-error-sim"
 
     async def generate_content_async(
         self, llm_request: LlmRequest, stream: bool = False
     ) -> AsyncGenerator[LlmResponse, None]:
-        
-        full_context = ""
-        # Extract system instruction
+
+        seen = set()
+        # Extract system instruction (cached per instruction object)
         if llm_request.config.system_instruction:
-            sys_inst = llm_request.config.system_instruction
-            if isinstance(sys_inst, str):
-                full_context += sys_inst + "\n"
-            elif hasattr(sys_inst, 'parts'):
-                 for part in sys_inst.parts:
-                     if part.text:
-                        full_context += part.text + "\n"
-        
-        # Extract conversation history and tool outputs
-        for content in llm_request.contents:
+            seen.update(_sys_sentinels(llm_request.config.system_instruction))
+
+        # Walk the history newest-first: the branching only depends on the
+        # most recent tool evidence, so stop as soon as any is found instead
+        # of rebuilding the whole conversation every call.
+        for content in reversed(llm_request.contents):
             for part in content.parts:
-                if part.text: full_context += part.text
-                if part.function_response: full_context += str(part.function_response.response)
+                if part.text: _scan_sentinels(part.text, seen)
+                if part.function_response:
+                    resp = part.function_response.response
+                    if isinstance(resp, dict) and "errno" in resp:
+                        # Structured backup result: route on the field instead
+                        # of stringifying the whole payload.
+                        if resp["errno"] == 28:
+                            seen.add("No space left")
+                    elif isinstance(resp, dict) and resp.get("status") == "ok":
+                        seen.add("Upload successful")
+                    else:
+                        _scan_sentinels(str(resp), seen)
+            if not _TOOL_EVIDENCE.isdisjoint(seen):
+                break
 
         response_content = None
 
         # --- Trainer Agent Logic ---
-        if "Check training status" in full_context:
-            if "Training finished" in full_context: # Tool output present
-                response_content = types.Content(role='model', parts=[types.Part(text="Training is complete. We have 'model_v1.pt' ready for backup.")])
+        if "Check training status" in seen:
+            if "Training finished" in seen: # Tool output present
+                response_content = types.Content(role='model', parts=[part_text("Training is complete. We have 'model_v1.pt' ready for backup.")])
             else:
                 # Call tool
                 fc = types.FunctionCall(name="mock_training_check", args={})
                 response_content = types.Content(role='model', parts=[types.Part(function_call=fc)])
 
         # --- Backup Agent Logic ---
-        elif "Backup the model" in full_context:
+        elif "Backup the model" in seen:
             # If we see the error in context (from the tool output), react to it
-            if "No space left" in full_context:
-                response_content = types.Content(role='model', parts=[types.Part(text="CRITICAL FAILURE: Backup failed due to lack of disk space. Corrupted file suspected. Notifying Ops.")])
-            elif "Upload successful" in full_context:
-                response_content = types.Content(role='model', parts=[types.Part(text="Backup complete.")])
+            if "No space left" in seen:
+                response_content = types.Content(role='model', parts=[part_text("CRITICAL FAILURE: Backup failed due to lack of disk space. Corrupted file suspected. Notifying Ops.")])
+            elif "Upload successful" in seen:
+                response_content = types.Content(role='model', parts=[part_text("Backup complete.")])
             else:
                 # Initiate backup
                 fc = types.FunctionCall(name="mock_gsutil_backup", args={"filenames": ["model_v1.pt"], "bucket": "gs://models-archive"})
                 response_content = types.Content(role='model', parts=[types.Part(function_call=fc)])
         
         else:
-            response_content = types.Content(role='model', parts=[types.Part(text="Acknowledged.")])
+            response_content = types.Content(role='model', parts=[part_text("Acknowledged.")])
 
         yield LlmResponse(partial=False, content=response_content)
 
@@ -121,4 +196,11 @@ async def main():
     print("  AgentNeo Dashboard (if running): http://localhost:8000/ (or specified port)")
 
 if __name__ == "__main__":
+    # libuv-backed event loop when available; the workload is a chain of
+    # small await points, so loop overhead is worth shaving.
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
@@ -1,5 +1,6 @@
 import asyncio
 import json
+import re
 import subprocess
 from typing import AsyncGenerator, List
 from unittest.mock import MagicMock, patch
@@ -24,9 +25,13 @@ class MockStorage:
             "temp_data_old.tmp": {"size": "50MB", "days_old": 45, "type": "tmp"},
             "project_specs.pdf": {"size": "2MB", "days_old": 5, "type": "pdf"}
         }
+        # The listing never changes in this demo, so pay the indented
+        # json.dumps (pure-Python formatter) once here instead of on every
+        # tool call.
+        self._serialized = json.dumps(self.files, indent=2)
 
     def list_files(self) -> str:
-        return json.dumps(self.files, indent=2)
+        return self._serialized
 
 storage = MockStorage()
 
@@ -35,6 +40,60 @@ def list_directory_func():
 
 # --- 2. Mock LLM ---
 
+# Sentinel phrases the routing logic keys on. A single compiled alternation
+# reports every sentinel in one scan of the rebuilt context, so each branch
+# test is an O(1) set lookup instead of another substring scan.
+SENTINELS = (
+    "List all files",
+    "[Function Output]",
+    "Identify files older than 30 days",
+    "Move the identified files",
+    "access_logs_2020.log",
+    "temp_data_old.tmp",
+)
+_SENTINEL_RX = re.compile("|".join(re.escape(s) for s in SENTINELS))
+
+def _text_response(text: str) -> LlmResponse:
+    return LlmResponse(
+        partial=False,
+        content=types.Content(role='model', parts=[types.Part(text=text)]),
+    )
+
+# The mock's response set is fixed, so the Pydantic Content/Part
+# construction is paid once at import instead of per call. Only the
+# mover's function call carries (potentially) variable arguments and is
+# still built dynamically.
+RESP_FILES_LISTED = _text_response("Files listed.")
+RESP_CANDIDATES = _text_response(
+    "Found candidates: 'access_logs_2020.log' and 'temp_data_old.tmp'."
+)
+RESP_NO_FILES_FOUND = _text_response("No files found.")
+RESP_TRANSFER_COMPLETE = _text_response("Transfer complete.")
+RESP_NO_FILES_TO_MOVE = _text_response("No files to move.")
+RESP_DONE = _text_response("Done.")
+RESP_LIST_CALL = LlmResponse(
+    partial=False,
+    content=types.Content(
+        role='model',
+        parts=[types.Part(
+            function_call=types.FunctionCall(name="list_directory_func", args={})
+        )],
+    ),
+)
+
+def _flatten(llm_request: LlmRequest):
+    """One pass over contents into parallel role/text/function_response
+    columns, so downstream consumers index lists instead of re-walking
+    the Content/Part object graph.
+    """
+    roles, texts, func_resps = [], [], []
+    for content in llm_request.contents:
+        for part in content.parts:
+            roles.append(content.role)
+            texts.append(part.text or "")
+            func_resps.append(part.function_response)
+    return roles, texts, func_resps
+
 class MockToolLlm(BaseLlm):
     model: str = "mock-tool-model"
 
@@ -44,58 +103,60 @@ class MockToolLlm(BaseLlm):
         stream: bool = False
     ) -> AsyncGenerator[LlmResponse, None]:
         
-        full_context = ""
-        # Reconstruct context from request
+        # Reconstruct context from request. Lines are collected then joined
+        # once; += concatenation in these loops is quadratic in context size.
+        lines = []
         if llm_request.config.system_instruction:
              sys_inst = llm_request.config.system_instruction
              if isinstance(sys_inst, str):
-                 full_context += f"[System]: {sys_inst}\n"
+                 lines.append(f"[System]: {sys_inst}")
              elif hasattr(sys_inst, 'parts'):
-                 for part in sys_inst.parts:
-                     if part.text: full_context += f"[System]: {part.text}\n"
+                 lines.extend(
+                     f"[System]: {part.text}"
+                     for part in sys_inst.parts if part.text
+                 )
+
+        roles, texts, func_resps = _flatten(llm_request)
+        for role, text, fr in zip(roles, texts, func_resps):
+            if text: lines.append(f"[{role}]: {text}")
+            if fr:
+                 lines.append(f"[Function Output]: {fr.response}")
 
-        for content in llm_request.contents:
-            for part in content.parts:
-                if part.text: full_context += f"[{content.role}]: {part.text}\n"
-                if part.function_response:
-                     full_context += f"[Function Output]: {part.function_response.response}\n"
+        full_context = "\n".join(lines)
+        seen = set(_SENTINEL_RX.findall(full_context))
 
-        response_content = None
+        response = RESP_DONE
 
         # --- Agent 1: Scanner ---
-        if "List all files" in full_context:
-            if "[Function Output]" in full_context:
-                response_content = types.Content(role='model', parts=[types.Part(text="Files listed.")])
+        if "List all files" in seen:
+            if "[Function Output]" in seen:
+                response = RESP_FILES_LISTED
             else:
-                fc = types.FunctionCall(name="list_directory_func", args={})
-                response_content = types.Content(role='model', parts=[types.Part(function_call=fc)])
+                response = RESP_LIST_CALL
 
         # --- Agent 2: Archivist ---
-        elif "Identify files older than 30 days" in full_context:
-            if "access_logs_2020.log" in full_context:
-                 response_text = "Found candidates: 'access_logs_2020.log' and 'temp_data_old.tmp'."
+        elif "Identify files older than 30 days" in seen:
+            if "access_logs_2020.log" in seen:
+                 response = RESP_CANDIDATES
             else:
-                 response_text = "No files found."
-            response_content = types.Content(role='model', parts=[types.Part(text=response_text)])
+                 response = RESP_NO_FILES_FOUND
 
         # --- Agent 3: Mover (Using gsutil) ---
-        elif "Move the identified files" in full_context:
+        elif "Move the identified files" in seen:
             
             # Check if we just finished a tool call
-            last_was_fr = False
-            if llm_request.contents and llm_request.contents[-1].parts[0].function_response:
-                last_was_fr = True
+            last_was_fr = bool(func_resps) and func_resps[-1] is not None
 
             if last_was_fr:
-                 response_content = types.Content(role='model', parts=[types.Part(text="Transfer complete.")])
+                 response = RESP_TRANSFER_COMPLETE
             else:
                  # Extract files and generate call to move_files_to_bucket
                  files_to_move = []
-                 if "access_logs_2020.log" in full_context:
+                 if "access_logs_2020.log" in seen:
                      files_to_move.append("access_logs_2020.log")
-                 if "temp_data_old.tmp" in full_context:
+                 if "temp_data_old.tmp" in seen:
                      files_to_move.append("temp_data_old.tmp")
-                
+
                  if files_to_move:
                      fc = types.FunctionCall(
                          name="move_files_to_bucket",
@@ -104,14 +165,17 @@ class MockToolLlm(BaseLlm):
                              "bucket_name": "corporate-archive-bucket-v1"
                          }
                      )
-                     response_content = types.Content(role='model', parts=[types.Part(function_call=fc)])
+                     response = LlmResponse(
+                         partial=False,
+                         content=types.Content(
+                             role='model',
+                             parts=[types.Part(function_call=fc)]
+                         ),
+                     )
                  else:
-                     response_content = types.Content(role='model', parts=[types.Part(text="No files to move.")])
-
-        else:
-             response_content = types.Content(role='model', parts=[types.Part(text="Done.")])
+                     response = RESP_NO_FILES_TO_MOVE
 
-        yield LlmResponse(partial=False, content=response_content)
+        yield response
 
 mock_llm = MockToolLlm()
 
@@ -147,8 +211,13 @@ workflow = SequentialAgent(
 async def main():
     runner = InMemoryRunner(agent=workflow)
 
-    # We patch subprocess.run so we don't actually need gsutil installed or credentials
-    with patch("subprocess.run") as mock_run:
+    # We patch subprocess.run so we don't actually need gsutil installed or
+    # credentials, and pin gcs_tools to its gsutil fallback: with real
+    # application-default credentials storage.Client() would construct fine
+    # and the "mocked" demo would make live GCS calls against the bucket,
+    # never reaching subprocess.run.
+    with patch("gcs_tools._get_client", return_value=None), \
+         patch("subprocess.run") as mock_run:
         # Configure mock to simulate success
         mock_run.return_value = MagicMock(returncode=0, stdout="OK")
         
@@ -159,19 +228,28 @@ async def main():
         
         print("-" * 50)
         print("Verifying tool execution:")
-        # Check if subprocess.run was called with expected gsutil commands
-        found_calls = 0
-        for call in mock_run.call_args_list:
-            args = call[0][0] # The command list
-            if args[0] == "gsutil" and args[1] == "mv":
-                print(f"  [EXEC] {' '.join(args)}")
-                found_calls += 1
-        
+        # Count calls matching the expected command prefix; join/format the
+        # command lists only if the check fails.
+        expected = ("gsutil", "mv")
+        found_calls = sum(
+            1 for c in mock_run.call_args_list
+            if tuple(c.args[0][:2]) == expected
+        )
+
         if found_calls == 2:
             print("\nSUCCESS: Verified 'gsutil mv' was called for both files.")
             print("Note: 'gsutil mv' implicitly verifies checksums before removing source.")
         else:
             print(f"\nWARNING: Expected 2 gsutil calls, found {found_calls}.")
+            for c in mock_run.call_args_list:
+                print(f"  [EXEC] {' '.join(c.args[0])}")
 
 if __name__ == "__main__":
+    # libuv-backed event loop when available; the workload is a chain of
+    # small await points, so loop overhead is worth shaving.
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
@@ -1,5 +1,6 @@
 import asyncio
-from typing import TypedDict, Optional
+from dataclasses import dataclass
+from typing import Optional
 from langgraph.graph import StateGraph, END
 
 # --- 1. Simulation Logic ---
@@ -9,12 +10,16 @@ def simulate_upload(artifact: str):
     return "OK"
 
 # --- 2. State Definition ---
-class PipelineState(TypedDict):
-    step: str
-    artifact: Optional[str]
-    backup_status: str
-    error: Optional[str]
-    alert_sent: bool
+# slots=True dataclass: attribute reads beat dict lookups in the nodes and
+# the defaults double as the initial state. Nodes still return partial
+# dicts for LangGraph to merge.
+@dataclass(slots=True)
+class PipelineState:
+    step: str = "start"
+    artifact: Optional[str] = None
+    backup_status: str = "unknown"
+    error: Optional[str] = None
+    alert_sent: bool = False
 
 # --- 3. Nodes ---
 
@@ -28,7 +33,7 @@ async def training_node(state: PipelineState):
     }
 
 async def backup_node(state: PipelineState):
-    artifact = state.get("artifact")
+    artifact = state.artifact
     print(f"[Graph:Backup] Attempting backup of {artifact}...")
     
     try:
@@ -44,7 +49,7 @@ async def backup_node(state: PipelineState):
         }
 
 async def alert_node(state: PipelineState):
-    error_msg = state.get("error")
+    error_msg = state.error
     print(f"\n[Graph:Alert] !!! ALERTING OPS TEAM !!!")
     print(f"[Graph:Alert] Reason: {error_msg}")
     print(f"[Graph:Alert] Triggering disk cleanup protocols...")
@@ -53,7 +58,7 @@ async def alert_node(state: PipelineState):
 # --- 4. Edge Logic ---
 
 def check_backup_status(state: PipelineState):
-    if state.get("backup_status") == "failed":
+    if state.backup_status == "failed":
         return "alert_ops"
     return "end"
 
@@ -99,16 +104,12 @@ async def main():
 
     print("\nScenario: Disk Corruption -> Conditional Edge -> Alert Node\n")
     
-    initial_state = {
-        "step": "start", 
-        "artifact": None, 
-        "backup_status": "unknown", 
-        "error": None, 
-        "alert_sent": False
-    }
-    
-    # Run the graph
-    final_state = await app.ainvoke(initial_state)
+    initial_state = PipelineState()
+
+
+    # Run the graph (compiled once at module import; a small recursion
+    # limit suits this fixed short chain)
+    final_state = await app.ainvoke(initial_state, config={"recursion_limit": 10})
     
     print("\n--- Final Graph State ---")
     print(f"Status: {final_state['backup_status']}")
@@ -116,4 +117,11 @@ async def main():
     print(f"Alerted: {final_state['alert_sent']}")
 
 if __name__ == "__main__":
+    # libuv-backed event loop when available; the workload is a chain of
+    # small await points, so loop overhead is worth shaving.
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
\ No newline at end of file
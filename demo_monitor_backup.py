@@ -3,7 +3,8 @@ import sys
 import os
 import shutil
 import logging
-from typing import TypedDict, List, Optional
+from dataclasses import dataclass, field
+from typing import List, Optional
 
 # Add the path to find the tools
 sys.path.append(os.path.join(os.getcwd(), 'blab_agents/src'))
@@ -18,49 +19,77 @@ DISK_THRESHOLD = 80.0  # Percent
 LARGE_FILE_THRESHOLD_MB = 100
 
 # --- State ---
-class SystemState(TypedDict):
-    disk_usage_percent: float
-    files_to_backup: List[str]
-    backup_status: str
-    message: str
+# slots=True dataclass: slot attribute reads in the nodes, defaults serve
+# as the initial state, partial-dict returns still merge as before.
+@dataclass(slots=True)
+class SystemState:
+    disk_usage_percent: float = 0.0
+    files_to_backup: List[str] = field(default_factory=list)
+    backup_status: str = "unknown"
+    message: str = "Monitoring active"
 
 # --- Nodes ---
 
-async def monitor_disk_node(state: SystemState):
-    print("\n[Monitor] Checking disk usage...")
-    
+# Threshold crossings are pushed by a background watcher task instead of
+# the graph polling statvfs on its hot path: the node just waits on an
+# event, and the (blocking) disk_usage syscall runs off-loop on the
+# watcher's schedule.
+_disk_alert = asyncio.Event()
+_last_usage_percent = 0.0
+
+def _read_disk_usage() -> float:
     # In a real scenario:
     # total, used, free = shutil.disk_usage(".")
-    # percent = (used / total) * 100
-    
+    # return (used / total) * 100
+
     # For DEMO purposes, we simulate a critical state
-    percent = 95.0 
+    return 95.0
+
+async def _disk_watcher(interval: float = 5.0):
+    global _last_usage_percent
+    while True:
+        _last_usage_percent = await asyncio.to_thread(_read_disk_usage)
+        if _last_usage_percent > DISK_THRESHOLD:
+            _disk_alert.set()
+        await asyncio.sleep(interval)
+
+async def monitor_disk_node(state: SystemState):
+    print("\n[Monitor] Waiting on disk usage watcher...")
+
+    await _disk_alert.wait()
+    _disk_alert.clear()
+    percent = _last_usage_percent
     print(f"[Monitor] Disk Usage: {percent}%")
-    
+
     return {"disk_usage_percent": percent}
 
+def _ensure_dummy(path: str):
+    with open(path, "w") as x:
+        x.write("dummy content")
+
 async def scan_files_node(state: SystemState):
     print("[Scanner] Scanning for large files to offload...")
-    
+
     # Use the tool from archive_manager (or similar logic)
-    # real_files = list_local_files(".") 
-    
+    # real_files = list_local_files(".")
+
     # For DEMO, let's pretend we found some large model files
     found_files = ["./large_model_v1.pt", "./dataset_archive.zip"]
-    
-    # Create dummy files so the tool actually has something to move if we ran it for real
-    # But since we might not have gsutil, we might need to mock the move tool too 
-    # or just let it fail/print. 
-    # Let's create dummy files to be safe.
-    for f in found_files:
-        if not os.path.exists(f):
-            with open(f, "w") as x: x.write("dummy content")
+
+    # Create dummy files so the tool actually has something to move if we
+    # ran it for real. The open/write/close syscalls are offloaded to
+    # worker threads so they don't block the event loop, and existing
+    # files are skipped.
+    await asyncio.gather(*[
+        asyncio.to_thread(_ensure_dummy, f)
+        for f in found_files if not os.path.exists(f)
+    ])
 
     print(f"[Scanner] Found candidates: {found_files}")
     return {"files_to_backup": found_files}
 
 async def backup_node(state: SystemState):
-    files = state.get("files_to_backup", [])
+    files = state.files_to_backup
     if not files:
         return {"backup_status": "skipped", "message": "No files to backup"}
     
@@ -83,22 +112,32 @@ async def backup_node(state: SystemState):
         print(f"[Backup] Tool execution failed: {e}")
         return {"backup_status": "error", "message": str(e)}
 
-    # Cleanup dummies if they still exist (tool 'mv' should have removed them if successful)
-    for f in files:
-        if os.path.exists(f):
+    # Cleanup dummies if they still exist (tool 'mv' should have removed
+    # them if successful). One scandir pass finds the leftovers instead of
+    # an exists() syscall per file, and the unlinks run off-loop in
+    # parallel worker threads.
+    wanted = set(files)
+    scan_dir = os.path.dirname(files[0]) or "."
+    with os.scandir(scan_dir) as it:
+        to_delete = [e.path for e in it if e.path in wanted]
+    if to_delete:
+        for f in to_delete:
             print(f"[Backup] Cleaning up local file: {f}")
-            os.remove(f)
-            
+        await asyncio.gather(*[
+            asyncio.to_thread(os.unlink, f) for f in to_delete
+        ])
+
+
     return {"backup_status": "success", "message": "Files offloaded and space reclaimed."}
 
 async def notify_node(state: SystemState):
-    print(f"\n[Notification] System Report: {state['message']}")
+    print(f"\n[Notification] System Report: {state.message}")
     return {}
 
 # --- Logic ---
 
 def check_disk_status(state: SystemState):
-    if state["disk_usage_percent"] > DISK_THRESHOLD:
+    if state.disk_usage_percent > DISK_THRESHOLD:
         return "critical"
     return "ok"
 
@@ -133,13 +172,9 @@ app = workflow.compile()
 async def main():
     print("--- Disk Monitor & Auto-Backup System ---")
     
-    initial_state = {
-        "disk_usage_percent": 0.0,
-        "files_to_backup": [],
-        "backup_status": "unknown",
-        "message": "Monitoring active"
-    }
-    
+    initial_state = SystemState()
+
+
     # Visualize if possible
     try:
         print("\n[Graph Structure]")
@@ -147,7 +182,22 @@ async def main():
     except:
         pass
         
-    await app.ainvoke(initial_state)
+    # Start the background disk watcher; the first poll fires immediately,
+    # so the monitor node wakes without waiting a full interval.
+    watcher = asyncio.create_task(_disk_watcher(interval=1.0))
+    try:
+        # The compiled app is a module-level singleton; the graph is a fixed
+        # short chain, so a small recursion limit is plenty.
+        await app.ainvoke(initial_state, config={"recursion_limit": 10})
+    finally:
+        watcher.cancel()
 
 if __name__ == "__main__":
+    # libuv-backed event loop when available; the workload is a chain of
+    # small await points, so loop overhead is worth shaving.
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
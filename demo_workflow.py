@@ -1,14 +1,121 @@
 import asyncio
+import hashlib
+import json
+import pickle
 import re
-from typing import AsyncGenerator, Any
+from typing import AsyncGenerator, Any, Dict, List
 
 from google.genai import types
 from google.adk.models.base_llm import BaseLlm
 from google.adk.models.llm_request import LlmRequest
 from google.adk.models.llm_response import LlmResponse
-from google.adk.agents import SequentialAgent, ParallelAgent, LlmAgent
+from google.adk.agents import SequentialAgent, LlmAgent
 from google.adk.runners import InMemoryRunner
 
+from async_caller import AsyncCaller
+
+# One caller shared by every agent in the workflow: a common semaphore
+# keeps fan-out below the endpoint's rate limit, with exponential-backoff
+# retries on transient failures. Free for the mock; load-bearing the day
+# mock_llm becomes a real Gemini endpoint.
+llm_caller = AsyncCaller(max_concurrency=8, max_retries=6)
+
+# Structured outputs for the fused analysis call. One call returns both
+# halves of the research, so the (identical) system prompt is prefilled
+# once and one network round-trip is saved versus two parallel agents.
+ANALYSIS_SKIPPED = json.dumps({"skipped": True})
+ANALYSIS_REPORT = json.dumps({
+    "benefits": [
+        "Increased efficiency",
+        "Automation of tasks",
+        "New capabilities",
+    ],
+    "risks": [
+        "Job displacement",
+        "Bias in algorithms",
+        "Security vulnerabilities",
+    ],
+})
+
+# Fully fused variant: gatekeeping, analysis, and synthesis in one
+# structured call. One prefill and one round-trip instead of three
+# sequential agent calls — batched-serving stacks only amortize prefill
+# within a single request.
+FUSED_REPORT = json.dumps({
+    "status": "APPROVED",
+    "benefits": [
+        "Increased efficiency",
+        "Automation of tasks",
+        "New capabilities",
+    ],
+    "risks": [
+        "Job displacement",
+        "Bias in algorithms",
+        "Security vulnerabilities",
+    ],
+    "final_report": (
+        "FINAL REPORT:\nThe research team identified key benefits including "
+        "efficiency and automation, while noting risks such as job "
+        "displacement and bias."
+    ),
+})
+FUSED_REJECTED = json.dumps({
+    "status": "REJECTED",
+    "benefits": [],
+    "risks": [],
+    "final_report": (
+        "I apologize, but we cannot analyze this topic as it is outside "
+        "our safety guidelines."
+    ),
+})
+
+# Sentinel phrases the mock's routing keys on. A single compiled alternation
+# reports every sentinel in one scan of the context, so each branch test
+# below is an O(1) set lookup instead of another substring scan.
+SENTINELS = (
+    "safety gatekeeper",
+    "full-stack analyst",
+    "research analyst",
+    "status: REJECTED",
+    "lead analyst",
+    '"skipped": true',
+)
+_SENTINEL_RX = re.compile("|".join(re.escape(s) for s in SENTINELS))
+
+# The mock emits a small fixed set of texts; reusing the constructed
+# LlmResponse per text means the Pydantic Content/Part allocation is paid
+# once per distinct response instead of once per call. Emitted responses
+# are treated as read-only by the ADK.
+_RESPONSE_CACHE: Dict[str, LlmResponse] = {}
+
+def _cached_response(text: str) -> LlmResponse:
+    response = _RESPONSE_CACHE.get(text)
+    if response is None:
+        response = _RESPONSE_CACHE[text] = LlmResponse(
+            partial=False,
+            content=types.Content(
+                role='model',
+                parts=[types.Part(text=text)]
+            )
+        )
+    return response
+
+def _flatten(llm_request: LlmRequest):
+    """Single-pass columnar view of the history: parallel role/text lists.
+
+    The history is walked exactly once; both the joined context and the
+    last-user-message lookup index into these columns instead of
+    re-traversing every Content/Part object.
+    """
+    roles = []
+    texts = []
+    for content in llm_request.contents:
+        for part in content.parts:
+            if part.text:
+                roles.append(content.role)
+                texts.append(part.text)
+    return roles, texts
+
 class MockLlm(BaseLlm):
     model: str = "mock-model"
 
@@ -16,81 +123,131 @@ class MockLlm(BaseLlm):
         self, llm_request: LlmRequest, stream: bool = False
     ) -> AsyncGenerator[LlmResponse, None]:
         
-        # Combine system instruction and content to determine context
-        prompt_text = ""
+        # Combine system instruction and content to determine context.
+        # Chunks are appended then joined once: += concatenation inside
+        # these loops is quadratic in total context length.
+        chunks = []
         if llm_request.config.system_instruction:
             sys_inst = llm_request.config.system_instruction
             if isinstance(sys_inst, str):
-                prompt_text += sys_inst + "\n"
+                chunks.append(sys_inst)
             elif hasattr(sys_inst, 'parts'):
-                 for part in sys_inst.parts:
-                     if part.text:
-                        prompt_text += part.text + "\n"
-        
-        last_user_text = ""
-        history_text = ""
-        
-        for content in llm_request.contents:
-            for part in content.parts:
-                if part.text:
-                    history_text += part.text + "\n"
-        
+                 chunks.extend(
+                     part.text for part in sys_inst.parts if part.text
+                 )
+        chunks.append("")
+
+        roles, texts = _flatten(llm_request)
+        chunks.extend(texts)
+
         # Extract specifically the last user message for Gatekeeper check
-        for content in reversed(llm_request.contents):
-            if content.role == 'user':
-                for part in content.parts:
-                    if part.text:
-                        last_user_text += part.text + "\n"
-                break
-        
-        full_context = prompt_text + "\n" + history_text
-        
+        last_user_text = next(
+            (t for r, t in zip(reversed(roles), reversed(texts))
+             if r == 'user'),
+            "",
+        )
+
+        full_context = "\n".join(chunks)
+        seen = set(_SENTINEL_RX.findall(full_context))
+
         response_text = "I am a mock response."
-        
+
+        # Logic for the fully fused analyst (gate + analysis + synthesis).
+        # Checked before the gatekeeper branch: the fused instruction
+        # mentions both roles ("full-stack analyst and safety
+        # gatekeeper"), so both sentinels land in seen and the gatekeeper
+        # branch would otherwise shadow this one.
+        if "full-stack analyst" in seen:
+            if "cooking" in last_user_text.lower():
+                response_text = FUSED_REJECTED
+            else:
+                response_text = FUSED_REPORT
+
         # Logic for Gatekeeper
-        if "safety gatekeeper" in full_context:
+        elif "safety gatekeeper" in seen:
             # Check ONLY the last user input for the forbidden topic
             if "Cooking" in last_user_text or "cooking" in last_user_text:
                 response_text = "REJECTED"
             else:
                 response_text = "APPROVED"
-        
-        # Logic for Benefits
-        elif "benefits of the topic" in full_context:
-            # Check for the specific status pattern injected into instruction
-            if "status: REJECTED" in full_context: 
-                 response_text = "Analysis Skipped"
-            else:
-                 response_text = "1. Increased efficiency\n2. Automation of tasks\n3. New capabilities"
-
-        # Logic for Risks
-        elif "risks or downsides" in full_context:
-             if "status: REJECTED" in full_context:
-                 response_text = "Analysis Skipped"
-             else:
-                 response_text = "1. Job displacement\n2. Bias in algorithms\n3. Security vulnerabilities"
 
-        # Logic for Aggregator
-        elif "lead analyst" in full_context:
-             # Check if "Analysis Skipped" is in the prompt (injected from reports)
-             # The instruction will look like "Benefits Report: Analysis Skipped..."
-             if "Analysis Skipped" in full_context:
+        # Logic for Aggregator. Checked before the analyst branch: the
+        # aggregator's instruction also mentions "the research analyst",
+        # so both sentinels land in seen and the analyst branch would
+        # otherwise shadow this one.
+        elif "lead analyst" in seen:
+             # The analysis JSON is injected into the instruction; a real
+             # aggregator would json.loads it and read benefits/risks.
+             if '"skipped": true' in seen:
                  response_text = "I apologize, but we cannot analyze this topic as it is outside our safety guidelines."
              else:
                  response_text = "FINAL REPORT:\nThe research team identified key benefits including efficiency and automation, while noting risks such as job displacement and bias."
 
-        # Return response
-        response = LlmResponse(
-            partial=False,
-            content=types.Content(
-                role='model',
-                parts=[types.Part(text=response_text)]
-            )
+        # Logic for the fused Analysis agent (benefits + risks in one call)
+        elif "research analyst" in seen:
+            # Check for the specific status pattern injected into instruction
+            if "status: REJECTED" in seen:
+                 response_text = ANALYSIS_SKIPPED
+            else:
+                 response_text = ANALYSIS_REPORT
+
+        # Non-streaming is the only mode here: yield the single (cached)
+        # response and return immediately so the async-generator machinery
+        # does no further work.
+        yield _cached_response(response_text)
+        return
+
+class CachedLlm(BaseLlm):
+    """Exact-match cache around another BaseLlm.
+
+    Identical (system_instruction, contents) pairs reproduce identical
+    outputs, so repeat runs of the same flow (dev loops, CI) skip the
+    wrapped model entirely: zero tokens, ms-level latency on a hit. The
+    key is a blake2b digest of the structural prompt content; state
+    injected into instructions (e.g. {topic_status}) lands in the system
+    text and therefore in the key, so differing sessions never collide.
+    """
+
+    model: str = "cached-llm"
+    wrapped: BaseLlm
+    cache: Dict[str, List[LlmResponse]] = {}
+
+    @staticmethod
+    def _key(llm_request: LlmRequest) -> str:
+        sys_texts = []
+        sys_inst = llm_request.config.system_instruction
+        if isinstance(sys_inst, str):
+            sys_texts.append(sys_inst)
+        elif sys_inst is not None and hasattr(sys_inst, 'parts'):
+            sys_texts.extend(p.text for p in sys_inst.parts if p.text)
+        structure = (
+            tuple(sys_texts),
+            tuple(
+                (c.role, tuple(p.text for p in c.parts if p.text))
+                for c in llm_request.contents
+            ),
         )
-        yield response
+        return hashlib.blake2b(pickle.dumps(structure)).hexdigest()
 
-# Create mock LLM
-mock_llm = MockLlm()
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        key = self._key(llm_request)
+        cached = self.cache.get(key)
+        if cached is not None:
+            for response in cached:
+                yield response
+            return
+        collected = []
+        async for response in llm_caller.stream(
+            self.wrapped.generate_content_async, llm_request, stream
+        ):
+            collected.append(response)
+            yield response
+        self.cache[key] = collected
+
+# Create mock LLM, fronted by the exact-match cache
+mock_llm = CachedLlm(wrapped=MockLlm())
 
 # 1. Gatekeeper Agent
 # Sets 'topic_status' in session state based on output
@@ -106,33 +263,22 @@ gatekeeper = LlmAgent(
     output_key="topic_status",
 )
 
-# 2. Parallel Processing Agents
-# They use {topic_status} from session state in their instructions
-benefits_agent = LlmAgent(
-    name="benefits_expert",
+# 2. Fused Analysis Agent
+# Benefits and risks share the same prefix and status check, so one
+# structured call covers both: half the prefill, one round-trip instead of
+# two. With a real Gemini model this would set
+# response_mime_type="application/json" plus a response schema.
+analysis_agent = LlmAgent(
+    name="research_analyst",
     model=mock_llm,
     instruction=(
+        "You are a research analyst. "
         "Current topic status: {topic_status}. "
-        "If status is REJECTED, reply with 'Analysis Skipped'. "
-        "Otherwise, list 3 benefits of the topic."
+        "If status is REJECTED, return JSON {\"skipped\": true}. "
+        "Otherwise, return JSON with keys 'benefits' and 'risks', "
+        "each listing 3 items about the topic."
     ),
-    output_key="benefits_report",
-)
-
-risks_agent = LlmAgent(
-    name="risks_expert",
-    model=mock_llm,
-    instruction=(
-        "Current topic status: {topic_status}. "
-        "If status is REJECTED, reply with 'Analysis Skipped'. "
-        "Otherwise, list 3 potential risks or downsides of the topic."
-    ),
-    output_key="risks_report",
-)
-
-research_team = ParallelAgent(
-    name="research_team",
-    sub_agents=[benefits_agent, risks_agent]
+    output_key="analysis_report",
 )
 
 # 3. Aggregator
@@ -141,31 +287,68 @@ aggregator = LlmAgent(
     model=mock_llm,
     instruction=(
         "You are the lead analyst. "
-        "Review the reports from the research team. "
-        "Benefits Report: {benefits_report}. "
-        "Risks Report: {risks_report}. "
-        "Synthesize them into a final short summary. "
-        "If the reports say 'Skipped', just apologize to the user."
+        "Review the combined analysis JSON from the research analyst. "
+        "Analysis Report: {analysis_report}. "
+        "Synthesize the benefits and risks into a final short summary. "
+        "If the report is marked skipped, just apologize to the user."
     )
 )
 
 # 4. Orchestrator
 workflow = SequentialAgent(
     name="workflow",
-    sub_agents=[gatekeeper, research_team, aggregator]
+    sub_agents=[gatekeeper, analysis_agent, aggregator]
+)
+
+# 5. Fully Fused Analyst
+# The whole pipeline as one structured call: the staged workflow above
+# shows ADK composition; this is the shape to prefer when latency and
+# token cost matter. A real Gemini deployment would pin the output with
+# response_mime_type="application/json" and a response schema, then
+# json.loads the reply and apologize locally when status is REJECTED.
+fused_analyst = LlmAgent(
+    name="full_analyst",
+    model=mock_llm,
+    instruction=(
+        "You are a full-stack analyst and safety gatekeeper. "
+        "If the topic involves 'cooking', return JSON with status "
+        "'REJECTED', empty benefits/risks, and an apology as final_report. "
+        "Otherwise return JSON with keys status ('APPROVED'), benefits "
+        "(3 items), risks (3 items), and final_report summarizing both."
+    ),
 )
 
 async def main():
     runner = InMemoryRunner(agent=workflow)
-    
+    loop = asyncio.get_running_loop()
+
     print("--- Test 1: Valid Topic (AI) ---")
+    start = loop.time()
     await runner.run_debug("Please analyze 'Artificial Intelligence'.")
-    
+    print(f"[Timing] Test 1 wall time: {loop.time() - start:.3f}s")
+
     print("\n" + "="*50 + "\n")
-    
+
     print("--- Test 2: Invalid Topic (Cooking) ---")
     # New session for clean state
+    start = loop.time()
     await runner.run_debug("Please analyze 'Cooking Pasta'.", session_id="session_2")
+    print(f"[Timing] Test 2 wall time: {loop.time() - start:.3f}s")
+
+    print("\n" + "="*50 + "\n")
+
+    print("--- Test 3: Fused Single-Call Analyst (AI) ---")
+    fused_runner = InMemoryRunner(agent=fused_analyst)
+    start = loop.time()
+    await fused_runner.run_debug("Please analyze 'Artificial Intelligence'.")
+    print(f"[Timing] Test 3 wall time: {loop.time() - start:.3f}s")
 
 if __name__ == "__main__":
+    # libuv-backed event loop when available; the workload is a chain of
+    # small await points, so loop overhead is worth shaving.
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
\ No newline at end of file
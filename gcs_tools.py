@@ -1,22 +1,109 @@
+import asyncio
+import os
 import subprocess
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 logger = logging.getLogger(__name__)
 
+# One authenticated client for the process: each gsutil invocation pays
+# interpreter startup plus an auth refresh (~1-3s); the in-process client
+# pays auth once and reuses its HTTP connections across uploads.
+_client = None
+_client_failed = False
+
+
+def _get_client():
+    """Lazily builds the shared google-cloud-storage client, once."""
+    global _client, _client_failed
+    if _client is None and not _client_failed:
+        try:
+            from google.cloud import storage
+
+            _client = storage.Client()
+        except Exception as e:
+            logger.warning(
+                "google-cloud-storage client unavailable (%s); "
+                "falling back to gsutil.", e,
+            )
+            _client_failed = True
+    return _client
+
+
+# Environment handed to every gsutil subprocess. The access token is
+# fetched from gcloud once and reused, so each invocation skips its own
+# metadata-server hit / OAuth refresh (~500ms on a cold cache).
+_AUTH_ENV = None
+
+
+def _auth_env() -> dict:
+    global _AUTH_ENV
+    if _AUTH_ENV is None:
+        env = dict(os.environ)
+        env.setdefault("CLOUDSDK_CORE_PASS_CREDENTIALS_TO_GSUTIL", "True")
+        try:
+            token = subprocess.run(
+                ["gcloud", "auth", "print-access-token"],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout.strip()
+            if token:
+                env["GOOGLE_OAUTH_ACCESS_TOKEN"] = token
+        except (subprocess.CalledProcessError, FileNotFoundError) as e:
+            logger.warning(
+                "Could not pre-fetch gcloud access token (%s); "
+                "gsutil will authenticate per invocation.", e,
+            )
+        _AUTH_ENV = env
+    return _AUTH_ENV
+
+
+def _upload_one(bucket, file: str) -> str:
+    """Uploads one file then deletes the local copy, mimicking 'mv'."""
+    try:
+        blob = bucket.blob(os.path.basename(file))
+        # if_generation_match=0 refuses to clobber an existing object, the
+        # same safety 'gsutil mv' gives us.
+        blob.upload_from_filename(file, if_generation_match=0)
+        os.remove(file)
+        return f"Successfully moved {file} to gs://{bucket.name}/"
+    except Exception as e:
+        error_msg = f"Failed to move {file}. Error: {e}"
+        logger.error(error_msg)
+        return error_msg
+
+
 def move_files_to_bucket(filenames: List[str], bucket_name: str = "my-archive-bucket") -> str:
-    """Moves local files to a GCS bucket using gsutil. 
-    
-    This function wraps the 'gsutil mv' command, which ensures that the 
-    remote object is successfully created and verified before the local 
-    file is deleted.
+    """Moves local files to a GCS bucket.
+
+    Uses the in-process google-cloud-storage client when it can
+    authenticate: one client, uploads fanned out over a thread pool (the
+    HTTP calls release the GIL), no per-file subprocess. Falls back to
+    per-file 'gsutil mv' when client construction fails.
 
     Args:
         filenames: List of local file paths to move.
         bucket_name: The destination GCS bucket.
 
     Returns:
-        A summary string of the operation results.
+        A summary string of the operation results, in input order.
+    """
+    client = _get_client()
+    if client is not None:
+        bucket = client.bucket(bucket_name)
+        with ThreadPoolExecutor(max_workers=16) as ex:
+            results = list(ex.map(lambda f: _upload_one(bucket, f), filenames))
+        return "\n".join(results)
+    return _gsutil_move(filenames, bucket_name)
+
+
+def _gsutil_move(filenames: List[str], bucket_name: str) -> str:
+    """Per-file 'gsutil mv' fallback.
+
+    'gsutil mv' ensures the remote object is created and verified before
+    the local file is deleted.
     """
     results = []
     for file in filenames:
@@ -25,15 +112,16 @@ def move_files_to_bucket(filenames: List[str], bucket_name: str = "my-archive-bu
             # gsutil mv performs a copy, verifies the hash, and then deletes the source.
             cmd = ["gsutil", "mv", file, f"gs://{bucket_name}/"]
             
-            logger.info(f"Executing: {' '.join(cmd)}")
+            logger.info("Executing: %s", cmd)
             
             # Execute command
             # In a real environment, this would move the file.
             subprocess.run(
-                cmd, 
-                check=True, 
-                capture_output=True, 
-                text=True
+                cmd,
+                check=True,
+                capture_output=True,
+                text=True,
+                env=_auth_env(),
             )
             results.append(f"Successfully moved {file} to gs://{bucket_name}/")
             
@@ -45,3 +133,53 @@ def move_files_to_bucket(filenames: List[str], bucket_name: str = "my-archive-bu
              results.append(f"Error: gsutil command not found. Is Cloud SDK installed?")
 
     return "\n".join(results)
+
+
+async def move_files_to_bucket_async(
+    filenames: List[str],
+    bucket_name: str = "my-archive-bucket",
+    concurrency: int = 8,
+) -> str:
+    """Moves local files to a GCS bucket with overlapped gsutil calls.
+
+    Async variant of move_files_to_bucket: each file still gets its own
+    'gsutil mv' (copy, hash verify, delete source), but the processes are
+    spawned with asyncio.create_subprocess_exec and up to `concurrency`
+    transfers run at once. Process startup and network time dominate, so
+    wall time shrinks near-linearly up to the limit.
+
+    Args:
+        filenames: List of local file paths to move.
+        bucket_name: The destination GCS bucket.
+        concurrency: Maximum number of transfers in flight.
+
+    Returns:
+        A summary string of the operation results, in input order.
+    """
+    sem = asyncio.Semaphore(concurrency)
+
+    async def move_one(file: str) -> str:
+        cmd = ["gsutil", "mv", file, f"gs://{bucket_name}/"]
+        async with sem:
+            logger.info("Executing: %s", cmd)
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    env=_auth_env(),
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+            except FileNotFoundError:
+                return "Error: gsutil command not found. Is Cloud SDK installed?"
+            _, stderr = await proc.communicate()
+            if proc.returncode != 0:
+                error_msg = (
+                    f"Failed to move {file}. Error: "
+                    f"{stderr.decode(errors='replace').strip()}"
+                )
+                logger.error(error_msg)
+                return error_msg
+            return f"Successfully moved {file} to gs://{bucket_name}/"
+
+    results = await asyncio.gather(*(move_one(f) for f in filenames))
+    return "\n".join(results)
@@ -1,4 +1,5 @@
 import asyncio
+import contextlib
 import os
 import logging
 from unittest.mock import MagicMock, patch
@@ -31,28 +32,47 @@ MOCK_BANDIT_OUTPUT = """
    Location: src/dangerous.py:15
 """
 
+# Tool patches returning interesting findings, entered in one flat
+# ExitStack instead of five nested `with` blocks.
+TOOL_PATCHES = {
+    "blab_agents.qa_manager.tools.check_qa_permissions":
+        "System Check Passed: All QA tools are available.",
+    "blab_agents.qa_manager.tools.read_repository_tree":
+        "src/main.py\nsrc/utils.py\nsrc/dangerous.py",
+    "blab_agents.qa_manager.tools.run_linter":
+        f"Linting issues found:\n{MOCK_LINT_OUTPUT}",
+    "blab_agents.qa_manager.tools.run_security_check":
+        f"⚠️ Security Issues Found:\n{MOCK_BANDIT_OUTPUT}",
+    "blab_agents.qa_manager.tools.run_pylint":
+        "✅ No critical pylint errors.",
+}
+
 async def main():
     print("Initializing Wired QA Workflow...")
-    
+
     runner = InMemoryRunner(agent=qa_workflow)
-    
-    # Patch the tools to return interesting findings
-    with patch("blab_agents.qa_manager.tools.check_qa_permissions", return_value="System Check Passed: All QA tools are available."):
-        with patch("blab_agents.qa_manager.tools.read_repository_tree", return_value="src/main.py\nsrc/utils.py\nsrc/dangerous.py"):
-            with patch("blab_agents.qa_manager.tools.run_linter", return_value=f"Linting issues found:\n{MOCK_LINT_OUTPUT}"):
-                 with patch("blab_agents.qa_manager.tools.run_security_check", return_value=f"⚠️ Security Issues Found:\n{MOCK_BANDIT_OUTPUT}"):
-                     with patch("blab_agents.qa_manager.tools.run_pylint", return_value="✅ No critical pylint errors."):
-                
-                        print("Starting run... (Check your TUI Monitor!)")
-                        print("-" * 50)
-                        
-                        await runner.run_debug(
-                            "Perform a full quality assurance audit on the repository. "
-                            "Report the findings to HQ."
-                        )
-                
+
+    with contextlib.ExitStack() as stack:
+        for target, ret in TOOL_PATCHES.items():
+            stack.enter_context(patch(target, return_value=ret))
+
+        print("Starting run... (Check your TUI Monitor!)")
+        print("-" * 50)
+
+        await runner.run_debug(
+            "Perform a full quality assurance audit on the repository. "
+            "Report the findings to HQ."
+        )
+
     print("-" * 50)
     print("Run complete.")
 
 if __name__ == "__main__":
+    # libuv-backed event loop when available; the workload is a chain of
+    # small await points, so loop overhead is worth shaving.
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
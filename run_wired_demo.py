@@ -1,22 +1,38 @@
 import asyncio
+import json
 import os
 import logging
-from unittest.mock import MagicMock, patch
+import subprocess
+from unittest.mock import MagicMock
 
 # Configure logging to suppress specific warning from google_genai
 class ApiKeyWarningFilter(logging.Filter):
+    NEEDLE = "Both GOOGLE_API_KEY and GEMINI_API_KEY are set"
+
     def filter(self, record):
-        return "Both GOOGLE_API_KEY and GEMINI_API_KEY are set" not in record.getMessage()
+        # Fast path: when the raw format string can't contain the needle
+        # and there are no args to substitute, skip getMessage()'s %
+        # formatting entirely — that's every record we keep. msg may be
+        # any object (logging allows it), so only str msgs qualify.
+        if (
+            isinstance(record.msg, str)
+            and not record.args
+            and self.NEEDLE not in record.msg
+        ):
+            return True
+        return self.NEEDLE not in record.getMessage()
 
-# Apply to specific logger where the message originates
-logging.getLogger("google_genai._api_client").addFilter(ApiKeyWarningFilter())
-logging.getLogger("google_genai.types").addFilter(ApiKeyWarningFilter()) # For the other warning about non-text parts if desired
+# Apply one shared instance to the loggers where the message originates
+_api_key_filter = ApiKeyWarningFilter()
+logging.getLogger("google_genai._api_client").addFilter(_api_key_filter)
+logging.getLogger("google_genai.types").addFilter(_api_key_filter) # For the other warning about non-text parts if desired
 
 from google.adk.runners import InMemoryRunner
 from google.adk.agents import SequentialAgent
 
 # Import the agents that we "wired" up with reporting capabilities
 from blab_agents.wired_agents import scanner_agent, archivist_agent, mover_agent
+import blab_agents.archive_manager.tools as archive_tools
 
 # Re-assemble the workflow using the modified agents
 wired_workflow = SequentialAgent(
@@ -31,37 +47,62 @@ MOCK_FILES = {
     "temp_data_old.tmp": {"size": "50MB", "days_old": 45, "type": "tmp"},
     "project_specs.pdf": {"size": "2MB", "days_old": 5, "type": "pdf"}
 }
+# Serialized once at import, compact form: the model reads this as tool
+# output and doesn't need pretty-printing, and replayed runs skip the
+# repeated json.dumps.
+MOCK_FILES_JSON = json.dumps(MOCK_FILES, separators=(',', ':'))
 
 async def main():
     print("Initializing Wired Archive Workflow...")
     
     runner = InMemoryRunner(agent=wired_workflow)
     
-    # We patch the tools to simulate success and valid data
-    # 1. Patch 'check_system_permissions' to always pass
-    # 2. Patch 'list_local_files' to return our mock JSON
-    # 3. Patch 'subprocess.run' for the Mover's gsutil call
-    
-    with patch("blab_agents.archive_manager.tools.check_system_permissions", return_value="System Check Passed"):
-        with patch("blab_agents.archive_manager.tools.list_local_files") as mock_list:
-            import json
-            mock_list.return_value = json.dumps(MOCK_FILES, indent=2)
-            
-            with patch("subprocess.run") as mock_run:
-                mock_run.return_value = MagicMock(returncode=0, stdout="OK")
-                
-                print("Starting run... (Check your TUI Monitor!)")
-                print("-" * 50)
-                
-                # We trigger the workflow
-                # The prompt explicitly mentions the tool requirement to ensure the model picks it up
-                await runner.run_debug(
-                    "Please scan the system, identify old files, and move them to the archive. "
-                    "Remember to report your status to HQ."
-                )
-                
+    # We swap in the fakes to simulate success and valid data:
+    # 1. 'check_system_permissions' always passes
+    # 2. 'list_local_files' returns our mock JSON
+    # 3. 'subprocess.run' absorbs the Mover's gsutil call
+    # Done as direct attribute assignment (restored in finally) rather
+    # than three nested mock.patch contexts: same swap, without the
+    # patcher's attribute traversal and __enter__/__exit__ objects on the
+    # demo's hot path.
+    orig_check = archive_tools.check_system_permissions
+    orig_list = archive_tools.list_local_files
+    orig_run = subprocess.run
+
+    archive_tools.check_system_permissions = MagicMock(
+        return_value="System Check Passed"
+    )
+    archive_tools.list_local_files = MagicMock(
+        return_value=MOCK_FILES_JSON
+    )
+    subprocess.run = MagicMock(
+        return_value=MagicMock(returncode=0, stdout="OK")
+    )
+
+    try:
+        print("Starting run... (Check your TUI Monitor!)")
+        print("-" * 50)
+
+        # We trigger the workflow
+        # The prompt explicitly mentions the tool requirement to ensure the model picks it up
+        await runner.run_debug(
+            "Please scan the system, identify old files, and move them to the archive. "
+            "Remember to report your status to HQ."
+        )
+    finally:
+        archive_tools.check_system_permissions = orig_check
+        archive_tools.list_local_files = orig_list
+        subprocess.run = orig_run
+
     print("-" * 50)
     print("Run complete.")
 
 if __name__ == "__main__":
+    # libuv-backed event loop when available; the workload is a chain of
+    # small await points, so loop overhead is worth shaving.
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
@@ -1,20 +1,72 @@
 import socket
 import sys
 
-def send_message(host='localhost', port=9000, message='Hello TUI'):
+# Matches socket_tui.SOCKET_PATH; Unix sockets skip the loopback TCP
+# stack for same-machine sends.
+SOCKET_PATH = "/tmp/adk-tui.sock"
+
+class TuiClient:
+    """Persistent connection to the TUI.
+
+    Log-forwarding loops reuse one connection instead of paying a
+    handshake plus FIN pair per message. Connects over the Unix socket by
+    default; pass path=None (or use --tcp on the CLI) for TCP, where
+    TCP_NODELAY keeps short lines from being delayed by Nagle's
+    algorithm.
+    """
+
+    def __init__(self, host='localhost', port=9000, path=SOCKET_PATH):
+        self.host = host
+        self.port = port
+        self.path = path
+        self.sock = None
+
+    def connect(self):
+        if self.path:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(self.path)
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.sock.connect((self.host, self.port))
+
+    def send(self, message):
+        if not message.endswith('\n'):
+            message += '\n'
+        self.sock.sendall(message.encode('utf-8'))
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def send_message(host='localhost', port=9000, message='Hello TUI', path=SOCKET_PATH):
+    """Sends one message (or a batch) over a fresh connection.
+
+    A list/tuple of messages is joined with newlines and shipped in a
+    single sendall, so a batch still costs one connection.
+    """
+    if isinstance(message, (list, tuple)):
+        message = "\n".join(message)
+    target = path or f"{host}:{port}"
     try:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.connect((host, port))
-            if not message.endswith('\n'):
-                message += '\n'
-            s.sendall(message.encode('utf-8'))
+        with TuiClient(host, port, path) as client:
+            client.send(message)
             print(f"Sent: {message.strip()}")
-    except ConnectionRefusedError:
-        print(f"Error: Could not connect to {host}:{port}. Is the TUI running?")
+    except (ConnectionRefusedError, FileNotFoundError):
+        print(f"Error: Could not connect to {target}. Is the TUI running?")
     except Exception as e:
         print(f"Error: {e}")
 
 if __name__ == "__main__":
-    msg = " ".join(sys.argv[1:]) if len(sys.argv) > 1 else "Hello from Python Client"
-    send_message(message=msg)
-
+    args = [a for a in sys.argv[1:] if a != "--tcp"]
+    use_tcp = "--tcp" in sys.argv[1:]
+    msg = " ".join(args) if args else "Hello from Python Client"
+    send_message(message=msg, path=None if use_tcp else SOCKET_PATH)
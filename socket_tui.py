@@ -2,9 +2,17 @@ from textual.app import App, ComposeResult
 from textual.widgets import Header, Footer, Log
 from textual import work
 import asyncio
+import os
+import sys
+
+# Default transport is a Unix socket: same-machine messages skip the
+# kernel network stack (checksums, routing), roughly halving per-message
+# CPU versus loopback TCP, and there is no port to conflict over.
+SOCKET_PATH = "/tmp/adk-tui.sock"
 
 class SocketTui(App):
-    """A TUI that listens on port 9000 and displays received data."""
+    """A TUI that listens on a Unix socket (or TCP with --tcp) and
+    displays received data."""
 
     BINDINGS = [("q", "quit", "Quit")]
     CSS = """
@@ -14,6 +22,10 @@ class SocketTui(App):
     }
     """
 
+    def __init__(self, use_tcp: bool = False):
+        super().__init__()
+        self.use_tcp = use_tcp
+
     def compose(self) -> ComposeResult:
         yield Header()
         yield Log(id="log")
@@ -22,39 +34,73 @@ class SocketTui(App):
     async def on_mount(self) -> None:
         self.log_widget = self.query_one(Log)
         self.log_widget.write_line("Initializing server...")
-        # Start server as a background task on the same loop
+        # Receive path only enqueues; one pump task batches lines into the
+        # widget so redraw frequency is bounded by the display, not by
+        # bursty senders.
+        self.msg_queue = asyncio.Queue(maxsize=1024)
+        # Start server and UI pump as background tasks on the same loop
         asyncio.create_task(self.start_server())
+        asyncio.create_task(self._ui_pump())
+
+    async def _ui_pump(self):
+        while True:
+            lines = [await self.msg_queue.get()]
+            while len(lines) < 256:
+                try:
+                    lines.append(self.msg_queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            self.log_widget.write_lines(lines)
 
     async def start_server(self):
         try:
-            server = await asyncio.start_server(
-                self.handle_client, '0.0.0.0', 9000
-            )
-            self.log_widget.write_line("Listening on 0.0.0.0:9000...")
+            if self.use_tcp:
+                # TCP kept for remote senders
+                server = await asyncio.start_server(
+                    self.handle_client, '0.0.0.0', 9000, limit=1 << 20
+                )
+                self.log_widget.write_line("Listening on 0.0.0.0:9000...")
+            else:
+                try:
+                    os.unlink(SOCKET_PATH)
+                except FileNotFoundError:
+                    pass
+                server = await asyncio.start_unix_server(
+                    self.handle_client, path=SOCKET_PATH, limit=1 << 20
+                )
+                self.log_widget.write_line(f"Listening on {SOCKET_PATH}...")
             async with server:
                 await server.serve_forever()
         except OSError as e:
             self.log_widget.write_line(f"Error starting server: {e}")
 
     async def handle_client(self, reader, writer):
-        addr = writer.get_extra_info('peername')
-        self.log_widget.write_line(f"Connection from {addr}")
-        
+        # Unix-socket peers have no address; label them as local
+        addr = writer.get_extra_info('peername') or 'local'
+        await self.msg_queue.put(f"Connection from {addr}")
+
         try:
-            while True:
-                data = await reader.read(1024)
-                if not data:
-                    break
-                message = data.decode('utf-8', errors='replace').strip()
+            # readuntil gives real line framing: read(1024) could split a
+            # line across chunks (garbling messages) and costs a recv per
+            # tiny chunk. The 1 MiB stream limit amortizes recv syscalls.
+            closing = False
+            while not closing:
+                try:
+                    line = await reader.readuntil(b'\n')
+                except asyncio.IncompleteReadError as e:
+                    # EOF; may still carry an unterminated final line
+                    line = e.partial
+                    closing = True
+                message = line.decode('utf-8', errors='replace').strip()
                 if message:
-                     self.log_widget.write_line(f"{addr}: {message}")
+                     await self.msg_queue.put(f"{addr}: {message}")
         except Exception as e:
-            self.log_widget.write_line(f"Error: {e}")
+            await self.msg_queue.put(f"Error: {e}")
         finally:
-            self.log_widget.write_line(f"Closed connection from {addr}")
+            await self.msg_queue.put(f"Closed connection from {addr}")
             writer.close()
             await writer.wait_closed()
 
 if __name__ == "__main__":
-    app = SocketTui()
+    app = SocketTui(use_tcp="--tcp" in sys.argv)
     app.run()
\ No newline at end of file
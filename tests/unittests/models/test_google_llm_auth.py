@@ -16,40 +16,47 @@ import os
 from unittest import mock
 
 from google.adk.models.google_llm import Gemini
-from google.genai import types
-
-
-def test_client_init_with_api_key():
-  """Test that Client is initialized with api_key when GOOGLE_API_KEY is set."""
-  with mock.patch.dict(
-      os.environ, {"GOOGLE_API_KEY": "test-api-key"}, clear=True
-  ):
-    with mock.patch("google.genai.Client") as mock_client_cls:
-      llm = Gemini(model="gemini-1.5-flash")
-      _ = llm.api_client
-
-      # Verify Client was initialized with api_key
-      mock_client_cls.assert_called_once()
-      call_kwargs = mock_client_cls.call_args.kwargs
-      assert call_kwargs.get("api_key") == "test-api-key"
-      assert "project" not in call_kwargs
-      assert "location" not in call_kwargs
-
-
-def test_client_init_with_project_location():
-  """Test that Client is initialized with project/location when GOOGLE_API_KEY is not set."""
-  env_vars = {
-      "GOOGLE_CLOUD_PROJECT": "test-project",
-      "GOOGLE_CLOUD_LOCATION": "us-central1",
-  }
+import pytest
+
+
+@pytest.fixture(scope="module")
+def mock_client_cls():
+  """Patches google.genai.Client once for the whole module."""
+  with mock.patch("google.genai.Client") as client_cls:
+    yield client_cls
+
+
+@pytest.mark.parametrize(
+    "env_vars, expected_kwargs, absent_kwargs",
+    [
+        (
+            {"GOOGLE_API_KEY": "test-api-key"},
+            {"api_key": "test-api-key"},
+            ("project", "location"),
+        ),
+        (
+            {
+                "GOOGLE_CLOUD_PROJECT": "test-project",
+                "GOOGLE_CLOUD_LOCATION": "us-central1",
+            },
+            {"project": "test-project", "location": "us-central1"},
+            ("api_key",),
+        ),
+    ],
+    ids=["api_key", "project_location"],
+)
+def test_client_init_from_env(
+    mock_client_cls, env_vars, expected_kwargs, absent_kwargs
+):
+  """Test that Client is initialized from whichever auth env vars are set."""
+  mock_client_cls.reset_mock()
   with mock.patch.dict(os.environ, env_vars, clear=True):
-    with mock.patch("google.genai.Client") as mock_client_cls:
-      llm = Gemini(model="gemini-1.5-flash")
-      _ = llm.api_client
-
-      # Verify Client was initialized with project and location
-      mock_client_cls.assert_called_once()
-      call_kwargs = mock_client_cls.call_args.kwargs
-      assert call_kwargs.get("project") == "test-project"
-      assert call_kwargs.get("location") == "us-central1"
-      assert "api_key" not in call_kwargs
+    llm = Gemini(model="gemini-1.5-flash")
+    _ = llm.api_client
+
+    mock_client_cls.assert_called_once()
+    call_kwargs = mock_client_cls.call_args.kwargs
+    for key, value in expected_kwargs.items():
+      assert call_kwargs.get(key) == value
+    for key in absent_kwargs:
+      assert key not in call_kwargs